@@ -5,10 +5,18 @@
 
 import os
 import io
+import shutil
+import datetime
 import zipfile
-import subprocess
+import hashlib
+import tempfile
+import functools
+import importlib.metadata
+import threading
+import contextlib
 import streamlit as st
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 # The following imports are removed as they are not needed in the Streamlit app.
 # from google.colab import files
@@ -17,80 +25,383 @@ from pathlib import Path
 # The subprocess calls for installation are also removed, as these are handled
 # by the requirements.txt and packages.txt files in Streamlit Cloud.
 
+# Extensions whose converters need a real file on disk (pandoc, workbook
+# readers); everything else can be converted straight from a stream
+_PATH_ONLY_EXTENSIONS = {'.docx', '.pptx', '.odt', '.rtf', '.xlsx'}
+
+# Pandoc input formats for the extensions handled by pypandoc
+_PANDOC_FORMATS = {'.docx': 'docx', '.pptx': 'pptx', '.odt': 'odt', '.rtf': 'rtf'}
+
+# Zip members are converted concurrently; the work is mostly pandoc
+# subprocesses and C-level parsing, so threads overlap well
+_ZIP_WORKERS = min(32, (os.cpu_count() or 1) * 2)
+
+# Output of the expensive converters is memoized here, keyed by a hash of the
+# input bytes plus the converter and backend versions. Bump _CACHE_VERSION
+# whenever a converter's output format changes. The least recently used
+# entries are pruned once the directory grows past _CACHE_MAX_BYTES.
+_CACHE_DIR = Path.home() / '.cache' / 'uft'
+_CACHE_VERSION = 1
+_CACHE_MAX_BYTES = 256 << 20
+
+# Running estimate of the cache directory's size, so writes only scan the
+# directory when they push it over the cap. None until the first write.
+_cache_size = None
+_cache_lock = threading.Lock()
+
 def upload_file():
   """
   Provides a file upload widget for the user in a Streamlit environment.
-  Returns the file path of the uploaded file.
+  Returns the uploaded file, or None if nothing has been uploaded yet.
   """
   st.title("Universal File-to-Text Converter")
-  uploaded_file = st.file_uploader("Upload your file(s) (Word, Excel, PPTX, HTML, ZIP, etc.)", type=None)
-  if uploaded_file is not None:
-    # Save the uploaded file to a temporary location
-    file_path = uploaded_file.name
-    with open(file_path, "wb") as f:
-        f.write(uploaded_file.getbuffer())
-    return file_path
-  else:
+  return st.file_uploader("Upload your file(s) (Word, Excel, PPTX, HTML, ZIP, etc.)", type=None)
+
+def _open_binary(file_path, fileobj=None):
+  """
+  Returns a context manager yielding a binary stream for the input, reusing
+  fileobj when one is given so the caller keeps ownership of it.
+  """
+  if fileobj is not None:
+    return contextlib.nullcontext(fileobj)
+  return open(file_path, 'rb')
+
+def _cache_key(file_path):
+  """
+  Returns a hex digest of the file's contents, read in 1 MiB chunks.
+  """
+  h = hashlib.blake2b(digest_size=16)
+  with open(file_path, 'rb') as f:
+    for chunk in iter(lambda: f.read(1 << 20), b''):
+      h.update(chunk)
+  return h.hexdigest()
+
+def _write_cache(cache_path, text):
+  """
+  Stores converted text in the cache. Failures are ignored, since the cache
+  is only an optimization.
+  """
+  try:
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+    tmp_path.write_text(text, encoding='utf-8')
+    os.replace(tmp_path, cache_path)
+    size = cache_path.stat().st_size
+  except OSError:
+    return
+
+  global _cache_size
+  with _cache_lock:
+    if _cache_size is None:
+      _cache_size = sum(entry_size for _, entry_size, _ in _scan_cache())
+    else:
+      _cache_size += size
+    if _cache_size > _CACHE_MAX_BYTES:
+      _cache_size = _prune_cache()
+
+def _scan_cache():
+  """
+  Returns (mtime, size, path) for every entry in the cache directory.
+  """
+  entries = []
+  try:
+    for entry in os.scandir(_CACHE_DIR):
+      if entry.name.endswith('.md'):
+        stat = entry.stat()
+        entries.append((stat.st_mtime, stat.st_size, entry.path))
+  except OSError:
+    pass
+  return entries
+
+def _prune_cache():
+  """
+  Deletes the least recently used cache entries until the cache fits in
+  _CACHE_MAX_BYTES, and returns the remaining size.
+  """
+  entries = _scan_cache()
+  total = sum(size for _, size, _ in entries)
+  for _, size, path in sorted(entries):
+    if total <= _CACHE_MAX_BYTES:
+      break
+    try:
+      os.remove(path)
+    except OSError:
+      pass
+    total -= size
+  return total
+
+def _package_version(name):
+  """
+  Returns the installed version of a distribution, or 'none' if missing.
+  """
+  try:
+    return importlib.metadata.version(name)
+  except importlib.metadata.PackageNotFoundError:
+    return 'none'
+
+# Converter backends are heavy, so each is imported on first use and the
+# result cached; a missing backend only fails the file types that need it
+
+@functools.lru_cache(maxsize=None)
+def _load_pypandoc():
+  """
+  Imports and returns the pypandoc module.
+  """
+  import pypandoc
+  return pypandoc
+
+@functools.lru_cache(maxsize=None)
+def _load_calamine():
+  """
+  Imports and returns python-calamine's CalamineWorkbook, or None if it is
+  not installed so callers can fall back to openpyxl.
+  """
+  try:
+    from python_calamine import CalamineWorkbook
+  except ImportError:
     return None
+  return CalamineWorkbook
+
+@functools.lru_cache(maxsize=None)
+def _load_openpyxl():
+  """
+  Imports and returns openpyxl's load_workbook.
+  """
+  from openpyxl import load_workbook
+  return load_workbook
+
+@functools.lru_cache(maxsize=None)
+def _load_bs4():
+  """
+  Imports and returns BeautifulSoup and its FeatureNotFound exception.
+  """
+  from bs4 import BeautifulSoup, FeatureNotFound
+  return BeautifulSoup, FeatureNotFound
+
+def _convert_pandoc(file_path, fileobj=None):
+  """
+  Converts a document (Word, PowerPoint, ODT, RTF) to Markdown with pandoc.
+  """
+  pypandoc = _load_pypandoc()
+  # The input format is known from the extension, so pass it explicitly and
+  # skip pypandoc's format detection and verification, which spawn extra
+  # pandoc processes
+  input_format = _PANDOC_FORMATS[Path(file_path).suffix.lower()]
+  return pypandoc.convert_file(file_path, to='markdown_strict', format=input_format, verify_format=False)
+
+def _stringify(value):
+  """
+  Formats a spreadsheet cell value, rendering empty cells as ''. Values are
+  printed the way openpyxl returns them: python-calamine reports every number
+  as a float and date-only cells as dates, so whole-number floats print as
+  integers and dates print as midnight datetimes.
+  """
+  if value is None:
+    return ''
+  if isinstance(value, float) and value.is_integer():
+    return str(int(value))
+  if isinstance(value, datetime.date) and not isinstance(value, datetime.datetime):
+    return str(datetime.datetime.combine(value, datetime.time()))
+  return str(value)
+
+def _convert_xlsx(file_path, fileobj=None):
+  """
+  Converts each sheet of an Excel workbook to pipe-separated rows.
+  """
+  # Build the output incrementally in a list and join once, avoiding
+  # quadratic string concatenation
+  parts = []
+  # Prefer the Rust-backed python-calamine reader, which is much faster
+  # than openpyxl; fall back to openpyxl when it is not installed
+  CalamineWorkbook = _load_calamine()
+  if CalamineWorkbook is not None:
+    workbook = CalamineWorkbook.from_path(file_path)
+    try:
+      for sheet_name in workbook.sheet_names:
+        sheet = workbook.get_sheet_by_name(sheet_name)
+        parts.append(f"\n\n# Excel Sheet: {sheet_name}\n")
+        # skip_empty_area=False pads the grid from A1 like openpyxl does;
+        # iter_rows() would start at the first used cell and shift columns
+        for row in sheet.to_python(skip_empty_area=False):
+          parts.append(' | '.join(map(_stringify, row)))
+          parts.append('\n')
+    finally:
+      # Release the file handle held by the workbook
+      workbook.close()
+  else:
+    load_workbook = _load_openpyxl()
+    # Read-only mode streams cells from the XML instead of building the
+    # full workbook object model; data_only returns cached formula values
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+      for sheet_name in workbook.sheetnames:
+        sheet = workbook[sheet_name]
+        parts.append(f"\n\n# Excel Sheet: {sheet_name}\n")
+        # values_only yields raw value tuples, skipping Cell construction
+        for row in sheet.iter_rows(values_only=True):
+          parts.append(' | '.join(map(_stringify, row)))
+          parts.append('\n')
+    finally:
+      # Read-only workbooks keep the underlying zip open until closed
+      workbook.close()
+  return ''.join(parts)
+
+def _convert_html(file_path, fileobj=None):
+  """
+  Extracts the visible text from an HTML document.
+  """
+  BeautifulSoup, FeatureNotFound = _load_bs4()
+  # Hand the raw bytes to the parser so it detects the document's charset
+  # instead of forcing UTF-8; the whole document is still read and decoded
+  with _open_binary(file_path, fileobj) as f:
+    try:
+      # lxml is C-backed and much faster than the pure-Python parser
+      soup = BeautifulSoup(f, 'lxml')
+    except FeatureNotFound:
+      soup = BeautifulSoup(f, 'html.parser')
+  # Extract all text and drop empty lines; filter keeps the per-line test
+  # in C rather than in a Python-level comprehension
+  return os.linesep.join(filter(None, soup.get_text().splitlines()))
+
+def _convert_zip_member(zip_ref, member):
+  """
+  Converts a single zip member, streaming it straight from the archive
+  unless its converter needs a real file on disk.
+  """
+  if Path(member.filename).suffix.lower() in _PATH_ONLY_EXTENSIONS:
+    # Copy the member out with a buffer sized to it, capped at 1 MiB, so
+    # small members are copied in a single read
+    with tempfile.TemporaryDirectory() as tmp_dir:
+      extracted_path = os.path.join(tmp_dir, Path(member.filename).name)
+      with zip_ref.open(member) as src, open(extracted_path, 'wb') as dst:
+        shutil.copyfileobj(src, dst, min(member.file_size, 1 << 20))
+      converted_content, _ = universal_file_converter(extracted_path)
+  else:
+    with zip_ref.open(member) as member_file:
+      converted_content, _ = universal_file_converter(member.filename, fileobj=member_file)
+  return f"\n\n-- ZIP Archive: {member.filename} --\n" + converted_content
+
+def _convert_zip(file_path, fileobj=None):
+  """
+  Converts every file in a zip archive, each under its own heading.
+  """
+  with zipfile.ZipFile(fileobj if fileobj is not None else file_path, 'r') as zip_ref:
+    # Directories and empty files contribute nothing; skip them before
+    # paying for extraction or a recursive conversion
+    members = [member for member in zip_ref.infolist() if not (member.is_dir() or member.file_size == 0)]
+    if fileobj is not None or len(members) < 2:
+      # A stream cannot be reopened per thread, so nested archives (and
+      # trivial ones) are converted in order on this thread
+      return ''.join(_convert_zip_member(zip_ref, member) for member in members)
+
+  # ZipFile objects are not safe to share between threads, so each worker
+  # opens the archive once for itself
+  local = threading.local()
+  opened = []
+
+  def convert(member):
+    zip_ref = getattr(local, 'zip_ref', None)
+    if zip_ref is None:
+      zip_ref = local.zip_ref = zipfile.ZipFile(file_path, 'r')
+      opened.append(zip_ref)
+    return _convert_zip_member(zip_ref, member)
 
-def universal_file_converter(file_path):
+  try:
+    with ThreadPoolExecutor(max_workers=min(_ZIP_WORKERS, len(members))) as executor:
+      # map preserves archive order in the output
+      return ''.join(executor.map(convert, members))
+  finally:
+    for zip_ref in opened:
+      zip_ref.close()
+
+def _convert_plain_text(file_path, fileobj=None):
+  """
+  Reads any other file as UTF-8 text.
+  """
+  if fileobj is not None:
+    wrapper = io.TextIOWrapper(fileobj, encoding='utf-8')
+    try:
+      return wrapper.read()
+    finally:
+      # Detach so the wrapper does not close the caller's stream when it is
+      # garbage-collected
+      wrapper.detach()
+  with open(file_path, 'r', encoding='utf-8') as f:
+    return f.read()
+
+# Maps file extensions to their converters; anything not listed is read as
+# plain text
+_HANDLERS = {
+    '.docx': _convert_pandoc,
+    '.pptx': _convert_pandoc,
+    '.odt': _convert_pandoc,
+    '.rtf': _convert_pandoc,
+    '.xlsx': _convert_xlsx,
+    '.html': _convert_html,
+    '.htm': _convert_html,
+    '.zip': _convert_zip,
+}
+
+# Only these converters are slow enough to be worth caching on disk
+_CACHED_HANDLERS = {_convert_pandoc, _convert_xlsx, _convert_html}
+
+@functools.lru_cache(maxsize=None)
+def _backend_tag(handler):
+  """
+  Names the backend (and its version) a cached handler converts with, so
+  output produced by a different backend is never served from the cache.
+  """
+  if handler is _convert_pandoc:
+    return f"pandoc{_load_pypandoc().get_pandoc_version()}"
+  if handler is _convert_xlsx:
+    if _load_calamine() is not None:
+      return f"calamine{_package_version('python-calamine')}"
+    return f"openpyxl{_package_version('openpyxl')}"
+  return f"bs4{_package_version('beautifulsoup4')}-lxml{_package_version('lxml')}"
+
+def universal_file_converter(file_path, fileobj=None, display_name=None):
   """
   Converts a wide variety of file types into a single Markdown/text string.
 
   Args:
-    file_path (str): The path to the file to be converted.
+    file_path (str): The path to the file to be converted. When fileobj is
+      given, this is only used as the file name.
+    fileobj (file-like, optional): An open binary stream to read from instead
+      of file_path, e.g. a member opened from a zip archive.
+    display_name (str, optional): The name to show in the status message,
+      e.g. the original name of an upload saved to a temporary path.
 
   Returns:
     tuple: A tuple containing the converted text (str) and a message (str).
   """
   # Determine the file type based on its extension
   file_extension = Path(file_path).suffix.lower()
+  if file_extension == '.pdf':
+    return "", "PDF conversion requires additional, complex packages. This function does not support it."
+  handler = _HANDLERS.get(file_extension, _convert_plain_text)
 
   # Output placeholder
   output_text = ""
-  message = f"Successfully converted {file_path} to Markdown."
+  message = f"Successfully converted {display_name or file_path} to Markdown."
 
   try:
-    if file_extension in ['.docx', '.pptx', '.odt', '.rtf']:
-      # Use pypandoc for direct document conversion
-      import pypandoc
-      output_text = pypandoc.convert_file(file_path, to='markdown_strict')
-    elif file_extension in ['.xlsx']:
-      # Handle Excel files using openpyxl
-      from openpyxl import load_workbook
-      workbook = load_workbook(file_path)
-      for sheet_name in workbook.sheetnames:
-        sheet = workbook[sheet_name]
-        output_text += f"\n\n# Excel Sheet: {sheet_name}\n"
-        for row in sheet.iter_rows():
-          row_text = ' | '.join([str(cell.value) if cell.value is not None else '' for cell in row])
-          output_text += row_text + '\n'
-    elif file_extension in ['.html', '.htm']:
-      # Use BeautifulSoup for HTML files
-      from bs4 import BeautifulSoup
-      with open(file_path, 'r', encoding='utf-8') as f:
-        html_content = f.read()
-      soup = BeautifulSoup(html_content, 'html.parser')
-      # Extract all text, clean up extra spaces and newlines
-      text_content = soup.get_text()
-      output_text = os.linesep.join([s for s in text_content.splitlines() if s])
-    elif file_extension == '.zip':
-      # Handle zip files by extracting and converting each file
-      with zipfile.ZipFile(file_path, 'r') as zip_ref:
-        for member in zip_ref.infolist():
-          if not member.is_dir():
-            extracted_path = zip_ref.extract(member)
-            converted_content, _ = universal_file_converter(extracted_path)
-            output_text += f"\n\n-- ZIP Archive: {member.filename} --\n"
-            output_text += converted_content
-            os.remove(extracted_path) # Clean up extracted file
-    elif file_extension == '.pdf':
-      message = "PDF conversion requires additional, complex packages. This function does not support it."
-      output_text = ""
-    else:
-      # For all other text-based files, read them directly
-      with open(file_path, 'r', encoding='utf-8') as f:
-        output_text = f.read()
+    # Files on disk with an expensive converter are looked up in the cache by
+    # content hash, so re-uploading the same file skips conversion entirely.
+    # Only successful conversions are written, since failures raise.
+    cache_path = None
+    if fileobj is None and handler in _CACHED_HANDLERS:
+      cache_path = _CACHE_DIR / f"{_cache_key(file_path)}-v{_CACHE_VERSION}-{_backend_tag(handler)}{file_extension}.md"
+      if cache_path.is_file():
+        output_text = cache_path.read_text(encoding='utf-8')
+        # Refresh the entry's mtime so pruning drops the least recently used
+        with contextlib.suppress(OSError):
+          os.utime(cache_path)
+        return output_text, message
+
+    output_text = handler(file_path, fileobj)
+
+    if cache_path is not None:
+      _write_cache(cache_path, output_text)
 
   except Exception as e:
     message = f"An error occurred during conversion: {e}"
@@ -98,13 +409,40 @@ def universal_file_converter(file_path):
 
   return output_text, message
 
-def display_and_download_output(text, file_name):
+# Keeps the most recent conversions in memory; bounded so a long-running
+# server does not hold every upload's output forever
+@st.cache_data(show_spinner=False, max_entries=32, ttl=3600)
+def _convert_cached(file_name, data):
+  """
+  Converts uploaded file contents, memoized on the file name and bytes so
+  Streamlit reruns on the same upload skip the conversion. The text is also
+  encoded for download here, so reruns do not re-encode it.
+
+  Args:
+    file_name (str): The original name of the uploaded file.
+    data (bytes): The contents of the uploaded file.
+
+  Returns:
+    tuple: A tuple containing the converted text (str), a message (str) and
+      the converted text encoded as UTF-8 (bytes).
+  """
+  # Save the upload to a temporary location under its original name, since
+  # some converters need a real file on disk
+  with tempfile.TemporaryDirectory() as tmp_dir:
+    file_path = Path(tmp_dir) / Path(file_name).name
+    file_path.write_bytes(data)
+    output_text, message = universal_file_converter(str(file_path), display_name=file_name)
+  return output_text, message, output_text.encode('utf-8')
+
+def display_and_download_output(text, file_name, data=None):
   """
   Displays a preview of the converted text and provides a download link.
 
   Args:
     text (str): The converted text to display.
     file_name (str): The original file name used for the download link.
+    data (bytes, optional): The text already encoded for download; defaults
+      to the text itself.
   """
   if not text:
     st.write("No content to display or download.")
@@ -119,16 +457,16 @@ def display_and_download_output(text, file_name):
   download_file_name = f"{Path(file_name).stem}_converted.md"
   st.download_button(
       label="Download Full Text",
-      data=text,
+      data=text if data is None else data,
       file_name=download_file_name,
       mime="text/markdown"
   )
 
 # --- Main execution block ---
 if __name__ == "__main__":
-  uploaded_file_path = upload_file()
-  if uploaded_file_path:
-    converted_text, status_message = universal_file_converter(uploaded_file_path)
+  uploaded_file = upload_file()
+  if uploaded_file is not None:
+    converted_text, status_message, download_data = _convert_cached(uploaded_file.name, uploaded_file.getvalue())
     st.write(status_message)
-    display_and_download_output(converted_text, uploaded_file_path)
+    display_and_download_output(converted_text, uploaded_file.name, download_data)
 